@@ -0,0 +1,257 @@
+# region Imports
+
+import os
+import asyncio
+import tempfile
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Executor
+from Utils.Scripts.settings import (
+    PREPLACE_GRASS,
+    PUZZLE_CACHE_SIZE,
+    PUZZLE_CACHE_DIR,
+    TREE,
+)
+from Utils.Scripts.funcs import (
+    CREATE_VALID_GAME,
+    DEFAULT_GEOMETRY,
+    Geometry,
+)
+
+# endregion
+
+# region Functions
+
+def pack_puzzle(board: np.ndarray, pieces: list[tuple[int, tuple[int, int], bool]], geometry: Geometry = DEFAULT_GEOMETRY) -> np.ndarray:
+    """Packs a freshly generated puzzle into one small array (of the smallest dtype that fits the geometry).
+
+    Args:
+        board (np.ndarray): The board.
+        pieces (list[tuple[int, tuple[int, int], bool]]): The pieces (in indices).
+        geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        np.ndarray: The flattened board followed by (type, x, y) for every piece.
+    """
+    return np.concatenate((
+        board.astype(geometry.dtype).ravel(),
+        np.array([(name, x, y) for name, (x, y), _ in pieces], dtype=geometry.dtype).ravel(),
+    ))
+
+def unpack_puzzle(data: np.ndarray, geometry: Geometry = DEFAULT_GEOMETRY) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+    """Unpacks a puzzle packed with pack_puzzle.
+
+    Args:
+        data (np.ndarray): The packed puzzle.
+        geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int], bool]]): A new copy of the board and the pieces.
+    """
+    height, width = geometry.shape
+    board = data[:height * width].reshape(height, width).copy()
+
+    # Only the trees are shown at the start of the game
+    pieces = [
+        (name, (x, y), name == TREE)
+        for name, x, y in data[height * width:].reshape(-1, 3).tolist()
+    ]
+
+    return board, pieces
+
+# endregion
+
+# region classes
+
+class PuzzleCache:
+    """LRU cache of the puzzles by seed, with an optional folder to also keep them on disk.
+
+    Only meant for puzzles that are asked for by seed (daily or shared ones), random one-off puzzles shouldn't go in here.
+    """
+
+    def __init__(self, max_size: int = PUZZLE_CACHE_SIZE, directory: str = PUZZLE_CACHE_DIR) -> None:
+        self.max_size = max_size
+        self.directory = directory
+
+        self._puzzles: OrderedDict[tuple, np.ndarray] = OrderedDict()
+
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, seed: int, geometry: Geometry = DEFAULT_GEOMETRY) -> tuple[int, int, int, int, bool]:
+        # Everything that changes the generated board
+        return (seed, *geometry.key, PREPLACE_GRASS)
+
+    def _path(self, key: tuple[int, int, int, int, bool]) -> str:
+        seed, width, height, tents, grass = key
+        return os.path.join(self.directory, f"{width}x{height}_{tents}_{int(grass)}_{seed}.npy")
+
+    def lookup(self, seed: int, geometry: Geometry = DEFAULT_GEOMETRY) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]] | None:
+        """Gets the puzzle of a seed if it is cached (in memory or on disk).
+
+        Args:
+            seed (int): The seed of the puzzle.
+            geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+        Returns:
+            board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int], bool]]) | None: A new copy of the board and the pieces, None if it isn't cached.
+        """
+        key = self.key(seed, geometry)
+
+        puzzle = self._from_memory(key, geometry)
+        if puzzle is not None:
+            return puzzle
+
+        data = self._load(key, geometry) if self.directory else None
+        if data is not None:
+            self.disk_hits += 1
+            self._remember(key, data)
+            return unpack_puzzle(data, geometry)
+
+        self.misses += 1
+        return None
+
+    def _from_memory(self, key: tuple[int, int, int, int, bool], geometry: Geometry) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]] | None:
+        data = self._puzzles.get(key)
+        if data is None:
+            return None
+
+        self.hits += 1
+        self._puzzles.move_to_end(key)
+        return unpack_puzzle(data, geometry)
+
+    def _load(self, key: tuple[int, int, int, int, bool], geometry: Geometry) -> np.ndarray | None:
+        # Read a puzzle from the disk cache, a broken file counts as a miss (it's overwritten when the puzzle is generated again)
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            data = np.load(path)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"Ignoring broken cache file {path}: {e}")
+            return None
+
+        height, width = geometry.shape
+        if data.ndim != 1 or data.dtype != geometry.dtype or data.size < height * width or (data.size - height * width) % 3:
+            print(f"Ignoring broken cache file {path}")
+            return None
+
+        return data
+
+    def _save(self, key: tuple[int, int, int, int, bool], data: np.ndarray) -> None:
+        # Write to a temporary file and move it in place, so a cut off write or two writes at once never leave a broken file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, seed: int, board: np.ndarray, pieces: list[tuple[int, tuple[int, int], bool]], geometry: Geometry = DEFAULT_GEOMETRY) -> None:
+        """Caches a puzzle that was just generated.
+
+        Args:
+            seed (int): The seed of the puzzle.
+            board (np.ndarray): The board.
+            pieces (list[tuple[int, tuple[int, int], bool]]): The pieces (in indices).
+            geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+        """
+        key = self.key(seed, geometry)
+        data = pack_puzzle(board, pieces, geometry)
+
+        if self.directory:
+            self._save(key, data)
+
+        self._remember(key, data)
+
+    def _remember(self, key: tuple[int, int, int, int, bool], data: np.ndarray) -> None:
+        self._puzzles[key] = data
+        if len(self._puzzles) > self.max_size:
+            self._puzzles.popitem(last=False) # Remove the least recently used puzzle
+
+    def get(self, seed: int, geometry: Geometry = DEFAULT_GEOMETRY) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+        """Gets the puzzle of a seed, only generating it if it isn't cached yet.
+
+        Args:
+            seed (int): The seed of the puzzle.
+            geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+        Returns:
+            board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int], bool]]): A new copy of the board and the pieces.
+        """
+        puzzle = self.lookup(seed, geometry)
+        if puzzle is None:
+            board, pieces = CREATE_VALID_GAME(seed, geometry)
+            self.put(seed, board, pieces, geometry)
+            puzzle = (board.astype(geometry.dtype), pieces)
+
+        return puzzle
+
+    async def get_async(
+        self, seed: int, geometry: Geometry = DEFAULT_GEOMETRY, executor: Executor | None = None
+    ) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+        """Like get, but the disk cache is read and written in a thread and the puzzle is generated in the executor, so the event loop never blocks.
+
+        Args:
+            seed (int): The seed of the puzzle.
+            geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+            executor (Executor | None, optional): Where to generate the puzzle. Defaults to None (a thread).
+
+        Returns:
+            board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int], bool]]): A new copy of the board and the pieces.
+        """
+        loop = asyncio.get_running_loop()
+        key = self.key(seed, geometry)
+
+        puzzle = self._from_memory(key, geometry)
+        if puzzle is not None:
+            return puzzle
+
+        if self.directory:
+            data = await loop.run_in_executor(None, self._load, key, geometry)
+            if data is not None:
+                self.disk_hits += 1
+                self._remember(key, data)
+                return unpack_puzzle(data, geometry)
+
+        self.misses += 1
+        board, pieces = await loop.run_in_executor(executor, CREATE_VALID_GAME, seed, geometry)
+        data = pack_puzzle(board, pieces, geometry)
+
+        if self.directory:
+            await loop.run_in_executor(None, self._save, key, data)
+
+        self._remember(key, data)
+        return board.astype(geometry.dtype), pieces
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._puzzles),
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Clears the memory cache (not the disk cache) and the stats."""
+        self._puzzles.clear()
+        self.hits = self.disk_hits = self.misses = 0
+
+# endregion
+
+# region vars
+
+# The cache for the puzzles that are asked for by seed
+PUZZLE_CACHE = PuzzleCache()
+
+# endregion
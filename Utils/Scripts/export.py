@@ -0,0 +1,190 @@
+"""Streaming export of generated puzzles.
+
+The puzzles are generated one at a time and written in chunks, so exporting 10 or 10 million puzzles uses the same memory:
+
+    python -m Utils.Scripts.export -n 1000000 --seed 0 -o puzzles.ndjson
+    python -m Utils.Scripts.export -n 10 --format text
+"""
+
+# region Imports
+
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Iterator, Iterable, Callable, TextIO
+from Utils.Scripts.settings import (
+    PREPLACE_GRASS,
+    EMPTY,
+    GRASS,
+    TREE,
+    TENT,
+)
+from Utils.Scripts.funcs import (
+    CREATE_VALID_GAME,
+    DEFAULT_GEOMETRY,
+    Geometry,
+    get_geometry,
+)
+
+# endregion
+
+# region vars
+
+# One character per field element for the text format
+TEXT_CHARS: dict[int, str] = {
+    EMPTY: ".",
+    GRASS: ",",
+    TREE: "T",
+    TENT: "A",
+}
+
+# Lookup table from field element (+1 so EMPTY is at index 0) to character
+_TEXT_LOOKUP = np.array([TEXT_CHARS[element] for element in sorted(TEXT_CHARS)])
+
+# endregion
+
+# region Functions
+
+def generate_puzzles(seed: int, count: int, geometry: Geometry = DEFAULT_GEOMETRY) -> Iterator[tuple[int, np.ndarray, list[tuple[int, tuple[int, int], bool]]]]:
+    """Generates the puzzles seed, seed + 1, ... one at a time.
+
+    Args:
+        seed (int): The seed of the first puzzle.
+        count (int): The amount of puzzles.
+        geometry (Geometry, optional): The shape of the boards. Defaults to DEFAULT_GEOMETRY.
+
+    Yields:
+        seed, board, trees_and_tents (int, np.ndarray, list[tuple[int, tuple[int, int], bool]]): The seed and the puzzle.
+    """
+    for s in range(seed, seed + count):
+        board, trees_and_tents = CREATE_VALID_GAME(s, geometry)
+        yield s, board, trees_and_tents
+
+def to_ndjson(seed: int, board: np.ndarray, pieces: list[tuple[int, tuple[int, int], bool]], geometry: Geometry = DEFAULT_GEOMETRY) -> str:
+    """Serialises a puzzle (with its solution) to one json line.
+
+    Args:
+        seed (int): The seed of the puzzle.
+        board (np.ndarray): The board.
+        pieces (list[tuple[int, tuple[int, int], bool]]): The pieces (in indices).
+        geometry (Geometry, optional): The geometry the puzzle was generated with. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        str: The json line.
+    """
+    return json.dumps({
+        "seed": seed,
+        "width": geometry.width,
+        "height": geometry.height,
+        "density": geometry.tent_density,
+        "grass": PREPLACE_GRASS,
+        "board": board.tolist(),
+        "tents": [list(pos) for name, pos, _ in pieces if name == TENT],
+        "trees": [list(pos) for name, pos, _ in pieces if name == TREE],
+    }, separators=(",", ":")) + "\n"
+
+def to_text(seed: int, board: np.ndarray, pieces: list[tuple[int, tuple[int, int], bool]], geometry: Geometry = DEFAULT_GEOMETRY) -> str:
+    """Serialises a puzzle to a compact text grid, laid out like pretty_print (without the solution).
+
+    Args:
+        seed (int): The seed of the puzzle.
+        board (np.ndarray): The board.
+        pieces (list[tuple[int, tuple[int, int], bool]]): The pieces (in indices), not used.
+        geometry (Geometry, optional): The geometry the puzzle was generated with. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        str: The header (seed and geometry), the column counts and the grid with the row counts, followed by an empty line.
+    """
+    width = geometry.width
+    column_counts = [str(count) for count in board[0, :width].tolist()]
+
+    # Every cell is as wide as the widest column count so the counts stay above their column
+    cell_width = max(map(len, column_counts))
+    cells = np.char.rjust(_TEXT_LOOKUP[geometry.cells(board) + 1], cell_width)
+
+    lines = [
+        f"# seed {seed} width {geometry.width} height {geometry.height} density {geometry.tent_density}",
+        " ".join(count.rjust(cell_width) for count in column_counts) + " " + str(board[0, width]),
+    ]
+    lines.extend(
+        " ".join(row) + " " + str(count)
+        for row, count in zip(cells.tolist(), board[1:, width].tolist())
+    )
+
+    return "\n".join(lines) + "\n\n"
+
+FORMATS: dict[str, Callable[[int, np.ndarray, list[tuple[int, tuple[int, int], bool]], Geometry], str]] = {
+    "ndjson": to_ndjson,
+    "text": to_text,
+}
+
+def export(
+    puzzles: Iterable[tuple[int, np.ndarray, list[tuple[int, tuple[int, int], bool]]]],
+    out: TextIO,
+    fmt: str = "ndjson",
+    chunk_size: int = 1000,
+    geometry: Geometry = DEFAULT_GEOMETRY,
+) -> int:
+    """Writes the puzzles to a file, chunk_size puzzles at a time.
+
+    Args:
+        puzzles (Iterable[tuple[int, np.ndarray, list[tuple[int, tuple[int, int], bool]]]]): The puzzles (like generate_puzzles yields them).
+        out (TextIO): The file to write to.
+        fmt (str, optional): "ndjson" or "text". Defaults to "ndjson".
+        chunk_size (int, optional): The amount of puzzles per write. Defaults to 1000.
+        geometry (Geometry, optional): The geometry the puzzles were generated with. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        int: The amount of puzzles written.
+    """
+    serialise = FORMATS[fmt]
+
+    written = 0
+    chunk: list[str] = []
+    for puzzle in puzzles:
+        chunk.append(serialise(*puzzle, geometry))
+
+        if len(chunk) >= chunk_size:
+            out.write("".join(chunk))
+            written += len(chunk)
+            chunk.clear()
+
+    out.write("".join(chunk))
+    written += len(chunk)
+
+    return written
+
+# endregion
+
+# Main function
+def main() -> int:
+    """Exports puzzles to a file or stdout."""
+    parser = argparse.ArgumentParser(description="Export Tentje Boompje puzzles")
+    parser.add_argument("-n", "--count", type=int, default=10, help="amount of puzzles")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first puzzle")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--width", type=int, default=DEFAULT_GEOMETRY.width)
+    parser.add_argument("--height", type=int, default=DEFAULT_GEOMETRY.height)
+    parser.add_argument("--density", type=float, default=DEFAULT_GEOMETRY.tent_density, help="average tents per row/column")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="puzzles per write")
+    parser.add_argument("-o", "--output", help="file to write to (default: stdout)")
+    args = parser.parse_args()
+
+    geometry = get_geometry(args.width, args.height, args.density)
+    puzzles = generate_puzzles(args.seed, args.count, geometry)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            export(puzzles, f, args.format, args.chunk_size, geometry)
+    else:
+        export(puzzles, sys.stdout, args.format, args.chunk_size, geometry)
+
+    return 0
+
+
+# region misc __main__
+if __name__ == "__main__":
+    sys.exit(main())
+
+# endregion
@@ -0,0 +1,128 @@
+# region Imports
+
+import time
+import numpy as np
+from collections import deque
+
+# endregion
+
+# region classes
+
+class FrameStats:
+    """Keeps track of the frame times and of the time between a click and the frame that shows it.
+
+    pygame doesn't say when a click happened, only when it's taken from the queue. A click taken in one poll
+    came in after the poll before it (maybe while that frame was still drawing or during the clock.tick),
+    so the latency counts from the poll before (the worst case). The time from taking the click to showing
+    it is kept as the processing time. Clicks that don't change anything on the screen are only counted.
+
+    Nothing in here uses pygame, so the report also works without a display.
+    """
+
+    def __init__(self, window: int = 600) -> None:
+        # Only keep the last `window` frames and clicks (10 seconds at 60 fps)
+        self.frame_times: deque[float] = deque(maxlen=window)
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.processing: deque[float] = deque(maxlen=window)
+
+        self.unchanged_clicks: int = 0
+
+        self._last_frame: float | None = None
+        self._last_poll: float | None = None
+        self._previous_poll: float | None = None
+        # (poll before the one that took the click, when the click was taken from the queue)
+        self._pending_clicks: list[tuple[float, float]] = []
+
+    def reset(self) -> None:
+        """Forgets everything, call at the start of every game so the time spent in between isn't counted as a frame."""
+        self.frame_times.clear()
+        self.latencies.clear()
+        self.processing.clear()
+        self.unchanged_clicks = 0
+
+        self._last_frame = None
+        self._last_poll = None
+        self._previous_poll = None
+        self._pending_clicks.clear()
+
+    def frame(self) -> None:
+        """Call once per frame, right after the display is updated."""
+        now = time.perf_counter()
+
+        if self._last_frame is not None:
+            self.frame_times.append((now - self._last_frame) * 1000)
+        self._last_frame = now
+
+        # Every click that happened before this frame is on the screen now
+        for waiting_since, taken in self._pending_clicks:
+            self.latencies.append((now - waiting_since) * 1000)
+            self.processing.append((now - taken) * 1000)
+        self._pending_clicks.clear()
+
+    def poll(self) -> None:
+        """Call right before the events are taken from the queue."""
+        self._previous_poll = self._last_poll
+        self._last_poll = time.perf_counter()
+
+    def click(self) -> None:
+        """Call when a click is taken from the event queue."""
+        now = time.perf_counter()
+        # The click could have come in any time after the poll before this one
+        waiting_since = self._previous_poll or self._last_poll or now
+        self._pending_clicks.append((waiting_since, now))
+
+    def unchanged(self) -> None:
+        """Call when the last click didn't change anything on the screen, so there's nothing to wait for."""
+        if self._pending_clicks:
+            self._pending_clicks.pop()
+            self.unchanged_clicks += 1
+
+    @property
+    def jitter(self) -> float:
+        # Standard deviation of the frame times in ms
+        return float(np.std(self.frame_times)) if self.frame_times else 0.0
+
+    @property
+    def last_latency(self) -> float:
+        return self.latencies[-1] if self.latencies else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """Returns the frame time and click latency statistics.
+
+        Returns:
+            dict[str, float]: The statistics in ms (and fps).
+        """
+        frames = np.array(self.frame_times) if self.frame_times else np.zeros(1)
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        processing = np.array(self.processing) if self.processing else np.zeros(1)
+
+        return {
+            "fps": 1000 / frames.mean() if frames.mean() else 0.0,
+            "frame_mean": float(frames.mean()),
+            "frame_p99": float(np.percentile(frames, 99)),
+            "frame_max": float(frames.max()),
+            "jitter": self.jitter,
+            "clicks": len(self.latencies),
+            "unchanged_clicks": self.unchanged_clicks,
+            "latency_p50": float(np.percentile(latencies, 50)),
+            "latency_p99": float(np.percentile(latencies, 99)),
+            "latency_max": float(latencies.max()),
+            "processing_p50": float(np.percentile(processing, 50)),
+            "processing_p99": float(np.percentile(processing, 99)),
+        }
+
+    def report(self) -> str:
+        """Returns the statistics as text to print.
+
+        Returns:
+            str: The report.
+        """
+        s = self.summary()
+        return (
+            f"Frames: {len(self.frame_times)}, {s['fps']:.1f} fps, "
+            f"frame time mean {s['frame_mean']:.2f}ms, p99 {s['frame_p99']:.2f}ms, max {s['frame_max']:.2f}ms, jitter {s['jitter']:.2f}ms\n"
+            f"Clicks: {s['clicks']} (+{s['unchanged_clicks']} that changed nothing), click to display (from the poll before) p50 {s['latency_p50']:.2f}ms, p99 {s['latency_p99']:.2f}ms, max {s['latency_max']:.2f}ms, "
+            f"processing p50 {s['processing_p50']:.2f}ms, p99 {s['processing_p99']:.2f}ms"
+        )
+
+# endregion
@@ -1,13 +1,77 @@
 # region Imports
 
 import numpy as np
-import random
+from functools import lru_cache
+
+# endregion
+
+# region Geometry
+
+class Geometry:
+    """The shape of a board: width x height cells plus the tent counts in row 0 and column `width`.
+
+    The neighbors of every cell are worked out once here, so the generation loops only have to look them up.
+    """
+
+    def __init__(self, width: int, height: int, tent_density: float) -> None:
+        self.width = width
+        self.height = height
+        self.tent_density = tent_density
+
+        self.tents: int = self.tent_count(width, height, tent_density)
+
+        # neighbors[k][x][y] are the neighbors of cell (x, y) for k = 4 or 8 (row 0 has the tent counts so it stays empty)
+        self.neighbors: dict[int, list[list[list[tuple[int, int]]]]] = {
+            k: [
+                [get_neighbors((x, y), k, geometry=self) if x != 0 else [] for y in range(width)]
+                for x in range(height + 1)
+            ]
+            for k in (4, 8)
+        }
+
+    @staticmethod
+    def tent_count(width: int, height: int, tent_density: float) -> int:
+        # The amount of tents to place (round(DIMENSION * 1.75) for the default square board)
+        return round(tent_density * (width + height) / 2)
+
+    @property
+    def key(self) -> tuple[int, int, int]:
+        # Everything about the geometry that changes the generated board
+        return (self.width, self.height, self.tents)
+
+    @property
+    def dtype(self) -> np.dtype:
+        # The smallest signed type that fits every value on the board (the biggest is the total amount of tents) and every position
+        return np.min_scalar_type(-max(self.width * self.height, self.width + 1, self.height + 1))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        # The shape of the board array
+        return (self.height + 1, self.width + 1)
+
+    def cells(self, board: np.ndarray) -> np.ndarray:
+        # A view of the playing field of the board (without the tent counts)
+        return board[1:, :self.width]
+
+@lru_cache(maxsize=64)
+def get_geometry(width: int, height: int, tent_density: float) -> Geometry:
+    """Returns the geometry for a board shape, only building the neighbor tables the first time.
+
+    Args:
+        width (int): The amount of columns.
+        height (int): The amount of rows.
+        tent_density (float): The average amount of tents per row/column.
+
+    Returns:
+        Geometry: The (shared) geometry, don't change it.
+    """
+    return Geometry(width, height, tent_density)
 
 # endregion
 
 # region Helper functions
 
-def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool = True) -> list[tuple[int, int]]:
+def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool = True, geometry: Geometry | None = None) -> list[tuple[int, int]]:
     """A function that returns all the surrounding positions of a given position. For all the positions that are out of the list it sets those to 'None'.
 
     Args:
@@ -15,11 +79,16 @@ def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool
         k (int, 4 or 8): The amount of surrounding positions to return.
         self (bool, optional): If True, the function will also return the current position in the list. Defaults to False.
         filter (bool, optional): If True, the function will filter out the out of bound indexes. Defaults to True.
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
 
     Returns:
         neighbors (list[tuple[int, int] | None]): The (un)filtered list of surrounding positions.
 
     """
+    # DEFAULT_GEOMETRY only exists once the settings are imported (at the bottom of this file)
+    geometry = geometry or DEFAULT_GEOMETRY
+    last_row = geometry.height
+    last_col = geometry.width - 1
 
     x = pos[0]
     y = pos[1]
@@ -34,7 +103,7 @@ def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool
         else None,
 
         (x - 1, y + 1)                                           # Top right
-        if (x - 1 >= 1 and y + 1 <= DIMENSION - 1 and k == 8)
+        if (x - 1 >= 1 and y + 1 <= last_col and k == 8)
         else None,
 
         (x, y - 1)                                               # Left
@@ -46,19 +115,19 @@ def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool
         else None,
 
         (x, y + 1)                                               # Right
-        if y + 1 <= DIMENSION - 1
+        if y + 1 <= last_col
         else None,
 
         (x + 1, y - 1)                                           # Top left
-        if x + 1 <= DIMENSION and y - 1 >= 0 and k == 8
+        if x + 1 <= last_row and y - 1 >= 0 and k == 8
         else None,
 
         (x + 1, y)                                               # Bottom
-        if x + 1 <= DIMENSION
+        if x + 1 <= last_row
         else None,
 
         (x + 1, y + 1)                                           # Bottom right
-        if x + 1 <= DIMENSION and y + 1 <= DIMENSION - 1 and k == 8
+        if x + 1 <= last_row and y + 1 <= last_col and k == 8
         else None
     ]
 
@@ -70,18 +139,20 @@ def get_neighbors(pos: tuple[int, int], k: int, self: bool = False, filter: bool
 
     return neighbors if not filter else [pos for pos in neighbors if pos] # type: ignore
 
-def touching_tents(board: np.ndarray, pos: tuple[int, int]) -> bool:
+def touching_tents(board: np.ndarray, pos: tuple[int, int], geometry: Geometry | None = None) -> bool:
     """This function checks if there are any touching tents on the board.
 
     Args:
         board (np.ndarray): The full game board.
         pos (tuple[int, int]): The position of the tent in the ndarray.
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
 
     Returns:
         bool: Are there touching tents?
     """
+    geometry = geometry or DEFAULT_GEOMETRY
 
-    for neighbor in get_neighbors(pos, 8):
+    for neighbor in geometry.neighbors[8][pos[0]][pos[1]]:
         # If the position is a tent a.k.a. the tents are touching
         if board[neighbor[0]][neighbor[1]] == TENT:
             return True
@@ -94,159 +165,170 @@ def pretty_print(board: np.ndarray) -> None:
     Args:
         board (np.ndarray): The board to print.
     """
-    emoji_list = []
-    for x in range(DIMENSION + 1):
-        row = []
-        for y in range(DIMENSION + 1):
-            if x == 0 or y == DIMENSION:
-                    row.append(board[x][y])
-            else:
-                row.append(elements[board[x][y]])
-        emoji_list.append(row)
+    height, width = board.shape[0] - 1, board.shape[1] - 1
 
-    print(np.array(emoji_list))
+    # Print it row by row instead of building the whole board out of strings first
+    for x in range(height + 1):
+        print(" ".join(
+            str(board[x][y]) if x == 0 or y == width else elements[board[x][y]]
+            for y in range(width + 1)
+        ))
 
 # endregion
 
 # region Board generation functions
 
-def randomly_place_tents_on_board(board: np.ndarray) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
-    tent_positions: list[tuple[int, tuple[int, int]]] = []
-
-    for _ in range(round(DIMENSION * 1.75)):
-        retry_counter = 0
-        while True:
-            x = random.randint(1, DIMENSION)
-            y = random.randint(0, DIMENSION - 1)
-            if board[x][y] == EMPTY and not touching_tents(board, (x, y)):
-                board[x][y] = TENT
-                tent_positions.append((TENT, (x, y), False))
-                break
+def randomly_place_tents_on_board(board: np.ndarray, rng: np.random.Generator, geometry: Geometry | None = None) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+    """Randomly places the tents on the board so that they don't touch.
 
-            if retry_counter > DIMENSION**2: # try max #cells_on_board times to place a tent
-                break
+    Args:
+        board (np.ndarray): The empty board.
+        rng (np.random.Generator): The random generator to use.
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        board, tent_positions (np.ndarray, list[tuple[int, tuple[int, int], bool]]): The board with the tents and the positions of the tents.
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    width = geometry.width
+
+    tent_positions: list[tuple[int, tuple[int, int], bool]] = []
+
+    # Go through all the cells in a random order (drawn all at once) and place a tent wherever it fits.
+    # Cells that don't fit now never will, so this is the same as trying random cells until one fits.
+    for cell in rng.permutation(width * geometry.height).tolist():
+        x = cell // width + 1
+        y = cell % width
+        if board[x][y] == EMPTY and not touching_tents(board, (x, y), geometry):
+            board[x][y] = TENT
+            tent_positions.append((TENT, (x, y), False))
 
-            retry_counter += 1
+            if len(tent_positions) == geometry.tents:
+                break
 
     return board, tent_positions
 
-def place_trees_on_board(board: np.ndarray) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
-    tree_positions: list[tuple[int, tuple[int, int]]] = []
-
-    for x in range(1, DIMENSION + 1): # for each row
-        for y in range(DIMENSION): # for each column
-            if board[x][y] == TENT:
-                neighbors = get_neighbors((x, y), 4)
-                random.shuffle(neighbors)
-                for nx, ny in neighbors:
-                    if board[nx][ny] == EMPTY:
-                        board[nx][ny] = TREE
-                        tree_positions.append((TREE, (nx, ny), True))
-                        break
-                    else:
-                        if DEBUG:
-                            print(f"Position: ({nx}, {ny}) is not empty it is: {board[nx][ny]} ({elements[board[nx][ny]]})")
+def place_trees_on_board(board: np.ndarray, rng: np.random.Generator, geometry: Geometry | None = None) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+    geometry = geometry or DEFAULT_GEOMETRY
+    tree_positions: list[tuple[int, tuple[int, int], bool]] = []
+
+    # for each tent, row by row
+    for x, y in (np.argwhere(geometry.cells(board) == TENT) + (1, 0)).tolist():
+        neighbors = list(geometry.neighbors[4][x][y]) # copy so the shuffle doesn't change the table
+        rng.shuffle(neighbors)
+        for nx, ny in neighbors:
+            if board[nx][ny] == EMPTY:
+                board[nx][ny] = TREE
+                tree_positions.append((TREE, (nx, ny), True))
+                break
+            else:
+                if DEBUG:
+                    print(f"Position: ({nx}, {ny}) is not empty it is: {board[nx][ny]} ({elements[board[nx][ny]]})")
 
     return board, tree_positions
 
-def generate_tent_counts_cells(board: np.ndarray) -> np.ndarray:
+def generate_tent_counts_cells(board: np.ndarray, geometry: Geometry | None = None) -> np.ndarray:
     """Creates the top row and far right column of the board. These rows and columns contain the amount of tents in the rows and columns.
 
     Args:
         board (np.ndarray): the generated game board.
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
 
     Returns:
         board (np.ndarray): The finished game board. :)
     """
+    geometry = geometry or DEFAULT_GEOMETRY
+    tents = geometry.cells(board) == TENT
+
     # Step 1: Generate the far right column (x-axis)
-    for x in range(1, DIMENSION + 1):
-        counter = sum(1 for y in range(DIMENSION) if board[x][y] == TENT)
-        board[x][DIMENSION] = counter
+    board[1:, geometry.width] = tents.sum(axis=1)
 
     # Step 2: Generate the top row (y-axis)
-    for y in range(DIMENSION):
-        counter = sum(1 for x in range(1, DIMENSION + 1) if board[x][y] == TENT)
-        board[0][y] = counter
+    board[0, :geometry.width] = tents.sum(axis=0)
 
     # Step 3: Set the top right corner to a the total amount of tents on the board
-    board[0][DIMENSION] = sum(board[0]) + 1
+    board[0, geometry.width] = tents.sum()
 
     return board
 
-def set_grass(board: np.ndarray) -> np.ndarray:
+def set_grass(board: np.ndarray, geometry: Geometry | None = None) -> np.ndarray:
     """Sets the grass on the board where there can't be any tents.
 
     Args:
         board (np.ndarray): The board
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
 
     Returns:
         np.ndarray: The updated board.
     """
-    # If the position of a tree is not given
-    for y in range(1, DIMENSION + 1): # For every row
-        for x in range(DIMENSION): # Go through every column
-
-            if board[0][x] == 0 or board[y][DIMENSION] == 0: # If the cell is in a collumn or a row with 0 tents
-                if board[y][x] != TREE:
-                    board[y][x] = GRASS
-
-            else: # for the rest of the rows
-                    if board[y][x] == EMPTY:
-                        trees_spaces = get_neighbors((y, x), 4)
-                        for nx, ny in trees_spaces:
-                            if board[nx][ny] == TREE:
-                                break
-                        else:
-                            board[y][x] = GRASS
+    geometry = geometry or DEFAULT_GEOMETRY
+    cells = geometry.cells(board)
+
+    # The cells in a collumn or a row with 0 tents
+    no_tents = (board[0, :geometry.width] == 0)[None, :] | (board[1:, geometry.width] == 0)[:, None]
+
+    # The cells next to a tree (above, below, left or right)
+    trees = cells == TREE
+    next_to_tree = np.zeros_like(trees)
+    next_to_tree[1:, :] |= trees[:-1, :]
+    next_to_tree[:-1, :] |= trees[1:, :]
+    next_to_tree[:, 1:] |= trees[:, :-1]
+    next_to_tree[:, :-1] |= trees[:, 1:]
+
+    cells[(no_tents & ~trees) | (~no_tents & (cells == EMPTY) & ~next_to_tree)] = GRASS
 
     return board
 
-def delete_tents(board: np.ndarray) -> np.ndarray:
-    for x in range(1, DIMENSION + 1):
-        for y in range(DIMENSION):
-            if board[x][y] == TENT:
-                board[x][y] = EMPTY
+def delete_tents(board: np.ndarray, geometry: Geometry | None = None) -> np.ndarray:
+    geometry = geometry or DEFAULT_GEOMETRY
+    cells = geometry.cells(board)
+    cells[cells == TENT] = EMPTY
     return board
 
 # endregion
 
 # region Main generation function
-def CREATE_VALID_GAME() -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+def CREATE_VALID_GAME(seed: int | np.random.Generator | None = None, geometry: Geometry | None = None) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
     """This function creates a valid game board.
 
     Args:
-        init_board (np.ndarray): The initial game board.
+        seed (int | np.random.Generator | None, optional): The seed of the board (the same seed always gives the same board) or the random generator to use. Defaults to None (a random board).
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
 
     Returns:
         board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int]]]): The finished game board and the positions of the tents and trees expressed in indices.
     """
+    geometry = geometry or DEFAULT_GEOMETRY
 
     # Define the list that will hold the positions of the tents and trees
     trees_and_tents: list[tuple[int, tuple[int, int], bool]] = []
 
+    # Every generation step draws from this generator so the board only depends on the seed
+    rng = np.random.default_rng(seed)
+
     # Step 1: Initialize the board
-    # Board needs to be 1 bigger than the DIMENSION to hold the info about how many tents are in the rows and columns
-    board = np.array([[EMPTY for _ in range(DIMENSION + 1)] for _ in range(DIMENSION + 1)])
+    # Board needs to be 1 bigger than the width and height to hold the info about how many tents are in the rows and columns
+    board = np.full(geometry.shape, EMPTY)
 
     # Step 2: Randomly place tents on the board
-    board, tent_positions = randomly_place_tents_on_board(board)
+    board, tent_positions = randomly_place_tents_on_board(board, rng, geometry)
 
     # Step 3: Place trees on the board
-    board, tree_positions = place_trees_on_board(board)
+    board, tree_positions = place_trees_on_board(board, rng, geometry)
 
     # Step 4: Generate the tent counts for the cells
-    board = generate_tent_counts_cells(board)
+    board = generate_tent_counts_cells(board, geometry)
 
     # Step 5: Set all the places where there can't be anything to grass (if the user wants to)
     if PREPLACE_GRASS:
-        board = set_grass(board)
+        board = set_grass(board, geometry)
 
     # Print the board to see if its correct
     if DEBUG:
         pretty_print(board)
 
     # Step 6: Delete the tents so the game is playable
-    board = delete_tents(board)
+    board = delete_tents(board, geometry)
 
     trees_and_tents.extend(tent_positions)
     trees_and_tents.extend(tree_positions)
@@ -256,6 +338,42 @@ def CREATE_VALID_GAME() -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bo
 
 # endregion
 
+# region Game logic functions
+
+def clicked_on_tent(board: np.ndarray, pos: tuple[int, int], geometry: Geometry | None = None) -> None:
+    """When the player clicks on a tent we update the board to show that the player clicked on a tent.
+
+    Args:
+        board (np.ndarray): the current board position
+        pos (tuple[int, int]): position of the tent (in indices, like in trees_and_tents)
+        geometry (Geometry | None, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    width = geometry.width
+
+    row, col = pos
+
+    # set all the surrounding spaces to grass
+    for n_row, n_col in geometry.neighbors[8][row][col]:
+        if board[n_row][n_col] != TREE:
+            board[n_row][n_col] = GRASS
+
+    # Update the board
+    board[row][width] -= 1
+    board[0][col] -= 1
+
+    # if the column is empty set all the spaces to grass
+    if board[0][col] <= 0:
+        column = board[1:, col]
+        column[column == EMPTY] = GRASS
+
+    # if the row is empty set all the spaces to grass
+    if board[row][width] <= 0:
+        cells = board[row, :width]
+        cells[cells == EMPTY] = GRASS
+
+# endregion
+
 # Main function
 def main() -> int:
     """Main utils function."""
@@ -276,7 +394,9 @@ def main() -> int:
 # region misc __main__
 if __name__ == "__main__":
     from settings import (
-        DIMENSION,
+        WIDTH,
+        HEIGHT,
+        TENT_DENSITY,
         PREPLACE_GRASS,
         EMPTY,
         GRASS,
@@ -285,6 +405,7 @@ if __name__ == "__main__":
         elements,
         DEBUG,
     )
+    DEFAULT_GEOMETRY = get_geometry(WIDTH, HEIGHT, TENT_DENSITY)
     exit_code = main()
 
     if exit_code != 0:
@@ -298,7 +419,9 @@ if __name__ == "__main__":
         )
 else:
     from Utils.Scripts.settings import (
-        DIMENSION,
+        WIDTH,
+        HEIGHT,
+        TENT_DENSITY,
         PREPLACE_GRASS,
         EMPTY,
         GRASS,
@@ -307,6 +430,9 @@ else:
         elements,
         DEBUG
     )
-    print("funcs.py imported")
+    # The board shape from the settings, used when no geometry is given
+    DEFAULT_GEOMETRY = get_geometry(WIDTH, HEIGHT, TENT_DENSITY)
+    if DEBUG:
+        print("funcs.py imported")
 
 # endregion
@@ -0,0 +1,182 @@
+# region Imports
+
+import random
+import hashlib
+import numpy as np
+from Utils.Scripts.settings import (
+    lives as START_LIVES,
+    PREPLACE_GRASS,
+    TENT,
+)
+from Utils.Scripts.funcs import (
+    CREATE_VALID_GAME,
+    DEFAULT_GEOMETRY,
+    Geometry,
+    clicked_on_tent,
+)
+from Utils.Scripts.cache import PUZZLE_CACHE
+
+# endregion
+
+# region Click results
+
+MISS: int = 0 # Clicked on a space without a piece -> lose a life
+PLACED: int = 1 # Clicked on a tent that wasn't placed yet
+ALREADY_CLICKED: int = 2 # Clicked on a tree or a tent that was already placed
+
+# endregion
+
+# region vars
+
+# Bump this when the replay record changes (1 had a single "dim" instead of width, height and density)
+RECORD_VERSION: int = 2
+
+# endregion
+
+# region Functions
+
+def generate_puzzle(seed: int, geometry: Geometry = DEFAULT_GEOMETRY) -> tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]]:
+    """Generates the puzzle that belongs to a seed.
+
+    Args:
+        seed (int): The seed of the puzzle.
+        geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        board, trees_and_tents (np.ndarray, list[tuple[int, tuple[int, int], bool]]): The board (as the smallest dtype that fits, to keep it small) and the pieces.
+    """
+    board, trees_and_tents = CREATE_VALID_GAME(seed, geometry)
+    return board.astype(geometry.dtype), trees_and_tents
+
+def board_digest(board: np.ndarray) -> str:
+    """A short fingerprint of a board, the same for every dtype the board can be stored in.
+
+    Args:
+        board (np.ndarray): The board.
+
+    Returns:
+        str: The fingerprint.
+    """
+    return hashlib.sha1(board.astype(np.int32).tobytes() + str(board.shape).encode()).hexdigest()[:16]
+
+# endregion
+
+# region classes
+
+class Game:
+    """All the state of one game, without anything to do with pygame so it can also run headless."""
+
+    __slots__ = ("seed", "geometry", "board", "pieces", "lives", "start_lives", "clicks", "_piece_index")
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        lives: int = START_LIVES,
+        puzzle: tuple[np.ndarray, list[tuple[int, tuple[int, int], bool]]] | None = None,
+        geometry: Geometry = DEFAULT_GEOMETRY,
+    ) -> None:
+        # Pick a seed if there isn't one so the game can always be replayed
+        self.seed: int = seed if seed is not None else random.randrange(2**32)
+        self.geometry = geometry
+
+        self.board: np.ndarray
+        self.pieces: list[tuple[int, tuple[int, int], bool]]
+        # The puzzle can already be generated (from the same seed) somewhere else.
+        # Only puzzles asked for by seed (replays, shared puzzles) are worth caching, random ones are never asked for again.
+        if puzzle is None:
+            puzzle = PUZZLE_CACHE.get(seed, geometry) if seed is not None else generate_puzzle(self.seed, geometry)
+        self.board, self.pieces = puzzle
+
+        self.lives: int = lives
+        self.start_lives: int = lives
+
+        # (time in ms since the start of the game, x, y) for every click, x and y are -1 for a miss
+        self.clicks: list[tuple[int, int, int]] = []
+
+        # Lookup from the position of a piece to its index in self.pieces
+        self._piece_index: dict[tuple[int, int], int] = {
+            piece[1]: i for i, piece in enumerate(self.pieces)
+        }
+
+    @property
+    def won(self) -> bool:
+        return bool(self.board[0][self.geometry.width] == 0)
+
+    @property
+    def lost(self) -> bool:
+        return self.lives <= 0
+
+    @property
+    def over(self) -> bool:
+        return self.won or self.lost
+
+    @property
+    def result(self) -> str:
+        if self.won:
+            return "won"
+        if self.lost:
+            return "lost"
+        return "unfinished"
+
+    def click(self, pos: tuple[int, int] | None, time: int = 0) -> int:
+        """Handles a click of the player.
+
+        Args:
+            pos (tuple[int, int] | None): The position of the click in indices, None if the click wasn't on a piece.
+            time (int, optional): The time of the click in ms since the start of the game. Defaults to 0.
+
+        Returns:
+            int: MISS, PLACED or ALREADY_CLICKED.
+        """
+        self.clicks.append((time, *(pos if pos is not None else (-1, -1))))
+
+        i = self._piece_index.get(pos) if pos is not None else None
+
+        # Clicked on a space without a piece
+        if i is None:
+            self.lives -= 1
+            return MISS
+
+        name, piece_pos, placed = self.pieces[i]
+
+        if name == TENT and not placed:
+            self.pieces[i] = (name, piece_pos, True)
+            # Update the far right column
+            self.board[0][self.geometry.width] -= 1
+            clicked_on_tent(self.board, piece_pos, self.geometry)
+            return PLACED
+
+        return ALREADY_CLICKED
+
+    def hint(self) -> tuple[int, int] | None:
+        """Gives the position of a tent that hasn't been placed yet.
+
+        Returns:
+            tuple[int, int] | None: The position of the tent in indices, None if all the tents are placed.
+        """
+        for name, pos, placed in self.pieces:
+            if name == TENT and not placed:
+                return pos
+        return None
+
+    def to_record(self) -> dict:
+        """Returns everything needed to replay this game.
+
+        Returns:
+            dict: The seed, the settings, the clicks and how the game ended (result, lives and a fingerprint of the board).
+        """
+        return {
+            "version": RECORD_VERSION,
+            "seed": self.seed,
+            "width": self.geometry.width,
+            "height": self.geometry.height,
+            "density": self.geometry.tent_density,
+            "grass": PREPLACE_GRASS,
+            "lives": self.start_lives,
+            "clicks": [list(click) for click in self.clicks],
+            "result": self.result,
+            "lives_left": self.lives,
+            "board": board_digest(self.board),
+        }
+
+# endregion
@@ -0,0 +1,151 @@
+"""Recording and headless replaying of games.
+
+Every game is saved as one json line (seed, settings, timestamped clicks and the result),
+so one file can hold thousands of games that can all be checked at once:
+
+    python -m Utils.Scripts.replay replays.ndjson
+"""
+
+# region Imports
+
+import sys
+import json
+import time
+from typing import Iterator
+from Utils.Scripts.settings import (
+    PREPLACE_GRASS,
+    REPLAY_FILE,
+)
+from Utils.Scripts.funcs import get_geometry
+from Utils.Scripts.game import Game, RECORD_VERSION, board_digest
+from Utils.Scripts.cache import PUZZLE_CACHE
+
+# endregion
+
+# region Recording
+
+def save_game(game: Game, path: str = REPLAY_FILE) -> None:
+    """Appends a game to the replay file.
+
+    Args:
+        game (Game): The game to save.
+        path (str, optional): The replay file. Defaults to REPLAY_FILE.
+    """
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(game.to_record(), separators=(",", ":")) + "\n")
+
+def load_games(path: str = REPLAY_FILE) -> Iterator[dict]:
+    """Reads the recorded games one by one from a replay file.
+
+    Args:
+        path (str, optional): The replay file. Defaults to REPLAY_FILE.
+
+    Yields:
+        dict: A recorded game.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# endregion
+
+# region Replaying
+
+def replay(record: dict) -> Game:
+    """Plays a recorded game again without a display.
+
+    Args:
+        record (dict): The recorded game (see Game.to_record).
+
+    Raises:
+        ValueError: If the game was recorded in another format or with other settings than the current ones.
+
+    Returns:
+        Game: The game after all the recorded clicks.
+    """
+    if not isinstance(record, dict):
+        raise TypeError(f"expected a json object, got {type(record).__name__}")
+
+    # Records from before the version field are version 1
+    version = record.get("version", 1)
+    if version != RECORD_VERSION:
+        raise ValueError(f"Game was recorded in format version {version}, only version {RECORD_VERSION} can be replayed")
+
+    if record["grass"] != PREPLACE_GRASS:
+        raise ValueError(f"Game was recorded with PREPLACE_GRASS={record['grass']}")
+
+    geometry = get_geometry(record["width"], record["height"], record["density"])
+    game = Game(record["seed"], record["lives"], geometry=geometry)
+
+    for t, x, y in record["clicks"]:
+        if game.over:
+            break
+        game.click((x, y) if x >= 0 else None, t)
+
+    return game
+
+def verify(record: dict) -> bool:
+    """Checks if replaying a recorded game ends the same way (result, lives left and board).
+
+    Args:
+        record (dict): The recorded game.
+
+    Returns:
+        bool: True if the game ends the same way.
+    """
+    game = replay(record)
+    return (
+        game.result == record["result"]
+        and game.lives == record["lives_left"]
+        and board_digest(game.board) == record["board"]
+    )
+
+# endregion
+
+# Main function
+def main() -> int:
+    """Verifies all the games in the given replay files."""
+    paths = sys.argv[1:] or [REPLAY_FILE]
+
+    total = 0
+    failed = 0
+    start = time.perf_counter()
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+
+                total += 1
+                try:
+                    # Parsed here (not with load_games) so a cut off line is reported like any other bad record
+                    record = json.loads(line)
+                    ok = verify(record)
+                except ValueError as e:
+                    print(f"{path}:{number}: {e}")
+                    failed += 1
+                    continue
+                except (KeyError, TypeError) as e:
+                    # A broken or unknown record shouldn't stop the other games from being checked
+                    print(f"{path}:{number}: invalid record ({type(e).__name__}: {e})")
+                    failed += 1
+                    continue
+
+                if not ok:
+                    failed += 1
+                    print(f"{path}:{number}: game doesn't end the same way (seed {record.get('seed')})")
+
+    elapsed = time.perf_counter() - start
+    print(f"Verified {total} games in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} games/s), {failed} failed")
+    print(f"Puzzle cache: {PUZZLE_CACHE.stats()}")
+
+    return 1 if failed else 0
+
+
+# region misc __main__
+if __name__ == "__main__":
+    sys.exit(main())
+
+# endregion
@@ -0,0 +1,384 @@
+"""A local puzzle server so lots of players can play from one process.
+
+Every request and response is one json object per line (over tcp or a unix socket):
+
+    {"op": "new", "seed": 42}                       -> {"ok": true, "session": 1, "seed": ..., "board": [[...]], "trees": [[x, y], ...], "lives": 3}
+    {"op": "click", "session": 1, "pos": [x, y]}    -> {"ok": true, "result": "placed", "lives": 3, "state": "unfinished", "board": [[...]]}
+    {"op": "hint", "session": 1}                    -> {"ok": true, "pos": [x, y]}
+    {"op": "close", "session": 1}                   -> {"ok": true}
+
+Positions are in indices (like in trees_and_tents), "pos" is null for a click that wasn't on a piece.
+"seed" is optional, without it you get a random puzzle. Puzzles asked for by seed are cached.
+The puzzles are generated in a process pool ahead of time so a new game never blocks the event loop.
+
+    python -m Utils.Scripts.server                  # serve
+    python -m Utils.Scripts.server --bench 100      # load test a running server with 100 clients
+"""
+
+# region Imports
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from Utils.Scripts.settings import (
+    SERVER_HOST,
+    SERVER_PORT,
+    PUZZLE_POOL_SIZE,
+    GENERATOR_WORKERS,
+    TREE,
+)
+from Utils.Scripts.cache import PUZZLE_CACHE
+from Utils.Scripts.game import (
+    Game,
+    generate_puzzle,
+    MISS,
+    PLACED,
+    ALREADY_CLICKED,
+)
+
+# endregion
+
+# region vars
+
+RESULT_NAMES: dict[int, str] = {
+    MISS: "miss",
+    PLACED: "placed",
+    ALREADY_CLICKED: "already",
+}
+
+# endregion
+
+# region Helper functions
+
+def parse_pos(pos: object) -> tuple[int, int] | None:
+    """Checks the position of a click.
+
+    Args:
+        pos (object): The position from the request.
+
+    Raises:
+        ValueError: If the position isn't null or a list of two ints.
+
+    Returns:
+        tuple[int, int] | None: The position, None for a click that wasn't on a piece.
+    """
+    if pos is None:
+        return None
+
+    if (
+        not isinstance(pos, list)
+        or len(pos) != 2
+        or not all(isinstance(n, int) and not isinstance(n, bool) for n in pos)
+    ):
+        raise ValueError(f"pos must be null or a list of two ints, not {pos!r}")
+
+    return (pos[0], pos[1])
+
+async def read_request(reader: asyncio.StreamReader) -> bytes | None:
+    """Reads one request line from a client.
+
+    Args:
+        reader (asyncio.StreamReader): The client.
+
+    Raises:
+        ValueError: If the line is longer than the reader's limit (the whole line is thrown away first).
+
+    Returns:
+        bytes | None: The line, None when the client is done.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # The last line without a newline at the end
+        return e.partial or None
+    except asyncio.LimitOverrunError:
+        pass
+
+    # Throw away the rest of the line so the next request starts at the right place
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            break
+        except asyncio.IncompleteReadError:
+            break
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+
+    raise ValueError("request line is too long")
+
+# endregion
+
+# region classes
+
+class PuzzlePool:
+    """Keeps a queue of puzzles ready that are generated in other processes."""
+
+    def __init__(self, size: int = PUZZLE_POOL_SIZE, workers: int = GENERATOR_WORKERS) -> None:
+        self.workers: int = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(self.workers)
+        self.queue: asyncio.Queue[tuple[int, tuple]] = asyncio.Queue(size)
+        self._fillers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        # One filler per worker so all the workers are kept busy until the queue is full
+        self._fillers = [asyncio.create_task(self._fill()) for _ in range(self.workers)]
+
+    async def _fill(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            seed = random.randrange(2**32)
+            try:
+                puzzle = await loop.run_in_executor(self.executor, generate_puzzle, seed)
+            except Exception as e:
+                # Keep filling, otherwise every new game would wait on the queue forever
+                print(f"Generating puzzle {seed} failed: {type(e).__name__}: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            await self.queue.put((seed, puzzle))
+
+    async def get(self) -> tuple[int, tuple]:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        for filler in self._fillers:
+            filler.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PuzzleServer:
+    """Handles the clients and keeps a Game for every session."""
+
+    def __init__(self, pool: PuzzlePool) -> None:
+        self.pool = pool
+        self.sessions: dict[int, Game] = {}
+        self._start_times: dict[int, float] = {}
+        self._ids = itertools.count(1)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # The sessions of this client, removed when it disconnects
+        owned: set[int] = set()
+
+        try:
+            while True:
+                try:
+                    line = await read_request(reader)
+                    if line is None:
+                        break
+                    response = await self.handle_request(json.loads(line), owned)
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                except Exception as e:
+                    # Something broke on our side (like the process pool), the client and its sessions can keep going
+                    print(f"Request failed: {type(e).__name__}: {e}")
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            for session in owned:
+                self.sessions.pop(session, None)
+                self._start_times.pop(session, None)
+            writer.close()
+
+    async def handle_request(self, request: dict, owned: set[int]) -> dict:
+        """Handles one request of a client.
+
+        Args:
+            request (dict): The request.
+            owned (set[int]): The sessions of the client.
+
+        Raises:
+            ValueError: If the request is invalid.
+            KeyError: If the session doesn't exist.
+
+        Returns:
+            dict: The response.
+        """
+        if not isinstance(request, dict):
+            raise ValueError("request must be a json object")
+
+        op = request.get("op")
+
+        if op == "new":
+            if request.get("seed") is not None:
+                # A specific (daily or shared) puzzle
+                seed = int(request["seed"])
+                puzzle = await PUZZLE_CACHE.get_async(seed, executor=self.pool.executor)
+            else:
+                seed, puzzle = await self.pool.get()
+
+            game = Game(seed, puzzle=puzzle)
+
+            session = next(self._ids)
+            self.sessions[session] = game
+            self._start_times[session] = time.monotonic()
+            owned.add(session)
+
+            return {
+                "ok": True,
+                "session": session,
+                "seed": seed,
+                "board": game.board.tolist(),
+                "trees": [list(pos) for name, pos, _ in game.pieces if name == TREE],
+                "lives": game.lives,
+            }
+
+        session = request["session"]
+        if session not in owned:
+            raise KeyError(f"unknown session {session}")
+        game = self.sessions[session]
+
+        if op == "click":
+            if game.over:
+                raise ValueError("game is already over")
+
+            pos = parse_pos(request.get("pos"))
+            result = game.click(pos, round((time.monotonic() - self._start_times[session]) * 1000))
+
+            response = {
+                "ok": True,
+                "result": RESULT_NAMES[result],
+                "lives": game.lives,
+                "state": game.result,
+            }
+            # Only send the board when it changed
+            if result == PLACED:
+                response["board"] = game.board.tolist()
+            return response
+
+        elif op == "hint":
+            pos = game.hint()
+            return {"ok": True, "pos": list(pos) if pos is not None else None}
+
+        elif op == "close":
+            owned.discard(session)
+            del self.sessions[session]
+            del self._start_times[session]
+            return {"ok": True}
+
+        raise ValueError(f"unknown op {op!r}")
+
+# endregion
+
+# region Functions
+
+async def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, unix: str | None = None) -> None:
+    """Runs the puzzle server until it gets cancelled.
+
+    Args:
+        host (str, optional): The host to listen on. Defaults to SERVER_HOST.
+        port (int, optional): The port to listen on. Defaults to SERVER_PORT.
+        unix (str | None, optional): The path of a unix socket to listen on instead. Defaults to None.
+    """
+    pool = PuzzlePool()
+    pool.start()
+    server = PuzzleServer(pool)
+
+    if unix:
+        listener = await asyncio.start_unix_server(server.handle_client, unix)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+
+    print(f"Serving on {unix or f'{host}:{port}'} with {pool.workers} generator workers")
+
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.close()
+
+async def _bench_client(
+    host: str, port: int, unix: str | None, games: int, latencies: list[float]
+) -> None:
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(message: dict) -> dict:
+        writer.write(json.dumps(message).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    for _ in range(games):
+        session = (await request({"op": "new"}))["session"]
+
+        # Solve the game with hints and time every click
+        while (pos := (await request({"op": "hint", "session": session}))["pos"]) is not None:
+            start = time.perf_counter()
+            response = await request({"op": "click", "session": session, "pos": pos})
+            latencies.append(time.perf_counter() - start)
+
+            if response["state"] != "unfinished":
+                break
+
+        await request({"op": "close", "session": session})
+
+    writer.close()
+
+async def bench(
+    clients: int, games: int, host: str = SERVER_HOST, port: int = SERVER_PORT, unix: str | None = None
+) -> None:
+    """Plays games on a running server with a lot of clients at the same time and prints the results.
+
+    Args:
+        clients (int): The amount of clients at the same time.
+        games (int): The amount of games per client.
+        host (str, optional): The host of the server. Defaults to SERVER_HOST.
+        port (int, optional): The port of the server. Defaults to SERVER_PORT.
+        unix (str | None, optional): The path of the unix socket of the server. Defaults to None.
+    """
+    latencies: list[float] = []
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(_bench_client(host, port, unix, games, latencies) for _ in range(clients))
+    )
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(f"{clients * games} sessions in {elapsed:.2f}s ({clients * games / elapsed:.1f} sessions/s)")
+    print(f"{len(ms)} moves, latency p50: {np.percentile(ms, 50):.2f}ms, p99: {np.percentile(ms, 99):.2f}ms, max: {ms.max():.2f}ms")
+
+# endregion
+
+# Main function
+def main() -> int:
+    """Starts the server or the load test."""
+    parser = argparse.ArgumentParser(description="Tentje Boompje puzzle server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--unix", help="listen on (or connect to) a unix socket instead")
+    parser.add_argument("--bench", type=int, metavar="CLIENTS", help="load test a running server")
+    parser.add_argument("--games", type=int, default=10, help="games per client for --bench")
+    args = parser.parse_args()
+
+    try:
+        if args.bench:
+            asyncio.run(bench(args.bench, args.games, args.host, args.port, args.unix))
+        else:
+            asyncio.run(serve(args.host, args.port, args.unix))
+
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+# region misc __main__
+if __name__ == "__main__":
+    sys.exit(main())
+
+# endregion
@@ -2,14 +2,35 @@
 
 # Board dimensions
 DIMENSION: int = 8
+WIDTH: int = DIMENSION # Amount of columns
+HEIGHT: int = DIMENSION # Amount of rows
+
+# Average amount of tents per row/column
+TENT_DENSITY: float = 1.75
 
 # Set all the places where there cant be a tent to grass (True) or leave them empty (False)
 PREPLACE_GRASS: bool = True
 
 # Misc
 fps_max: float = 60 # 0 for no limit
+SHOW_FRAME_STATS: bool = False # Show the frame time jitter and click latency next to the fps
+FRAME_REPORT: bool = False # Print the frame time and click latency statistics after every game
 lives: int = 3
 
+# Puzzle cache
+PUZZLE_CACHE_SIZE: int = 1024 # Amount of puzzles to keep in memory
+PUZZLE_CACHE_DIR: str = "" # Folder to also keep the puzzles on disk, "" for no disk cache
+
+# Replays
+RECORD_REPLAYS: bool = False # Append every played game to REPLAY_FILE
+REPLAY_FILE: str = "replays.ndjson"
+
+# Puzzle server
+SERVER_HOST: str = "127.0.0.1"
+SERVER_PORT: int = 8765
+PUZZLE_POOL_SIZE: int = 64 # Amount of puzzles to keep ready
+GENERATOR_WORKERS: int = 0 # 0 for one per cpu
+
 # endregion
 
 # region dont touch
@@ -0,0 +1,391 @@
+"""Validation of generated puzzle packs (like the ones from export.py).
+
+All the rules are checked with array operations on a whole stack of boards at once,
+and the packs are split over a process pool:
+
+    python -m Utils.Scripts.validate puzzles.ndjson
+"""
+
+# region Imports
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from collections import Counter
+from itertools import islice
+from typing import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from Utils.Scripts.settings import (
+    TENT_DENSITY,
+    EMPTY,
+    TREE,
+    TENT,
+)
+from Utils.Scripts.funcs import (
+    DEFAULT_GEOMETRY,
+    Geometry,
+)
+
+# endregion
+
+# region vars
+
+# Above, below, left and right
+DIRECTIONS: tuple[tuple[int, int], ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+RULES: tuple[str, ...] = (
+    "invalid_record",     # A line that isn't json or misses fields, or a board that doesn't fit its width and height (not checked further)
+    "malformed",          # Pieces outside the field, on the same cell twice or a tree and a tent on the same cell
+    "tent_count",         # Fewer tents than the geometry asks for
+    "tree_count",         # Not the same amount of trees as tents
+    "tree_without_tent",  # A tree without a tent above, below, left or right of it
+    "tent_without_tree",  # A tent without a tree above, below, left or right of it
+    "no_pairing",         # The tents and trees can't be paired up one to one (every tent next to its own tree)
+    "touching_tents",     # Two tents next to each other (also diagonally)
+    "row_counts",         # The far right column doesn't match the tents in the rows
+    "column_counts",      # The top row doesn't match the tents in the columns
+    "total_count",        # The top right corner isn't the total amount of tents
+    "board_trees",        # The trees on the board aren't the trees of the puzzle
+    "tent_not_empty",     # A tent is hidden under something else than an empty cell
+)
+
+# endregion
+
+# region Functions
+
+def _orthogonal_neighbors(mask: np.ndarray) -> np.ndarray:
+    # The cells above, below, left or right of a True cell (for a stack of boards)
+    neighbors = np.zeros_like(mask)
+    neighbors[:, 1:, :] |= mask[:, :-1, :]
+    neighbors[:, :-1, :] |= mask[:, 1:, :]
+    neighbors[:, :, 1:] |= mask[:, :, :-1]
+    neighbors[:, :, :-1] |= mask[:, :, 1:]
+    return neighbors
+
+def _shift(mask: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    # out[:, x, y] = mask[:, x + dx, y + dy] (False outside the field), for a stack of boards
+    height, width = mask.shape[1:]
+    out = np.zeros_like(mask)
+    out[:, max(-dx, 0):height - max(dx, 0), max(-dy, 0):width - max(dy, 0)] = \
+        mask[:, max(dx, 0):height - max(-dx, 0), max(dy, 0):width - max(-dy, 0)]
+    return out
+
+def _neighbor_counts(mask: np.ndarray) -> np.ndarray:
+    # How many True cells are above, below, left or right of every cell
+    return sum(_shift(mask, dx, dy).astype(np.int8) for dx, dy in DIRECTIONS)
+
+def _match_board(tents: np.ndarray, trees: np.ndarray) -> bool:
+    # Pairs up the tents and trees of one board with augmenting paths (only for the boards the forced pairs don't finish)
+    tree_index = {tuple(pos): i for i, pos in enumerate(np.argwhere(trees).tolist())}
+    options = [
+        [tree_index[(x + dx, y + dy)] for dx, dy in DIRECTIONS if (x + dx, y + dy) in tree_index]
+        for x, y in np.argwhere(tents).tolist()
+    ]
+    if len(options) != len(tree_index):
+        return False
+
+    tent_of_tree: dict[int, int] = {}
+
+    def augment(tent: int, seen: set[int]) -> bool:
+        for tree in options[tent]:
+            if tree in seen:
+                continue
+            seen.add(tree)
+            if tree not in tent_of_tree or augment(tent_of_tree[tree], seen):
+                tent_of_tree[tree] = tent
+                return True
+        return False
+
+    return all(augment(tent, set()) for tent in range(len(options)))
+
+def can_pair(tents: np.ndarray, trees: np.ndarray) -> np.ndarray:
+    """Checks if every tent can get its own tree next to it (and every tree its own tent), for a stack of boards.
+
+    A tent or tree with only one possible partner left has to be paired with it, so those pairs are taken off
+    all boards at once until nothing changes. Only boards where every piece left has more choices are matched one by one.
+
+    Args:
+        tents (np.ndarray): (N, height, width) mask of the tents.
+        trees (np.ndarray): (N, height, width) mask of the trees.
+
+    Returns:
+        np.ndarray: Which boards can be paired up.
+    """
+    tents = tents.copy()
+    trees = trees.copy()
+
+    changed = True
+    while changed:
+        changed = False
+        for pieces, partners in ((tents, trees), (trees, tents)):
+            for dx, dy in DIRECTIONS:
+                # Pieces whose only partner left is in this direction
+                forced = pieces & (_neighbor_counts(partners) == 1) & _shift(partners, dx, dy)
+                if forced.any():
+                    pieces &= ~forced
+                    partners &= ~_shift(forced, -dx, -dy)
+                    changed = True
+
+    left = tents.any(axis=(1, 2)) | trees.any(axis=(1, 2))
+    stuck = (tents & (_neighbor_counts(trees) == 0)).any(axis=(1, 2)) | (trees & (_neighbor_counts(tents) == 0)).any(axis=(1, 2))
+
+    paired = ~left
+    for i in np.flatnonzero(left & ~stuck):
+        paired[i] = _match_board(tents[i], trees[i])
+
+    return paired
+
+def positions_to_masks(
+    positions: list[np.ndarray], height: int, width: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Turns the positions of the pieces of a stack of boards into one mask per board.
+
+    Args:
+        positions (list[np.ndarray]): The (pieces, 2) positions (in indices) for every board.
+        height (int): The amount of rows.
+        width (int): The amount of columns.
+
+    Returns:
+        masks, malformed (np.ndarray, np.ndarray): (N, height, width) masks and which boards have invalid or duplicate positions.
+    """
+    n = len(positions)
+    lengths = np.array([len(p) for p in positions], dtype=np.intp)
+
+    masks = np.zeros((n, height, width), dtype=bool)
+    malformed = np.zeros(n, dtype=bool)
+    if not lengths.sum():
+        return masks, malformed
+
+    board_index = np.repeat(np.arange(n), lengths)
+    xs, ys = np.concatenate(positions).T
+
+    # Row 0 has the tent counts, so the field is rows 1..height and columns 0..width - 1
+    inside = (xs >= 1) & (xs <= height) & (ys >= 0) & (ys < width)
+    malformed[board_index[~inside]] = True
+    masks[board_index[inside], xs[inside] - 1, ys[inside]] = True
+
+    # Two pieces on the same cell
+    malformed |= masks.sum(axis=(1, 2)) != lengths
+
+    return masks, malformed
+
+def validate_boards(
+    boards: np.ndarray, tents: np.ndarray, trees: np.ndarray, expected_tents: int
+) -> dict[str, np.ndarray]:
+    """Checks all the rules for a stack of boards with the same shape.
+
+    Args:
+        boards (np.ndarray): (N, height + 1, width + 1) boards, like CREATE_VALID_GAME returns them.
+        tents (np.ndarray): (N, height, width) mask of the tents.
+        trees (np.ndarray): (N, height, width) mask of the trees.
+        expected_tents (int): The amount of tents the geometry asks for.
+
+    Returns:
+        dict[str, np.ndarray]: For every rule (except malformed) which boards break it.
+    """
+    width = boards.shape[2] - 1
+    cells = boards[:, 1:, :width]
+    tent_counts = tents.sum(axis=(1, 2))
+
+    touching = (
+        (tents[:, 1:, :] & tents[:, :-1, :]).any(axis=(1, 2))       # Above each other
+        | (tents[:, :, 1:] & tents[:, :, :-1]).any(axis=(1, 2))     # Next to each other
+        | (tents[:, 1:, 1:] & tents[:, :-1, :-1]).any(axis=(1, 2))  # Diagonal
+        | (tents[:, 1:, :-1] & tents[:, :-1, 1:]).any(axis=(1, 2))  # Other diagonal
+    )
+
+    return {
+        "tent_count": tent_counts < expected_tents,
+        "tree_count": trees.sum(axis=(1, 2)) != tent_counts,
+        "tree_without_tent": (trees & ~_orthogonal_neighbors(tents)).any(axis=(1, 2)),
+        "tent_without_tree": (tents & ~_orthogonal_neighbors(trees)).any(axis=(1, 2)),
+        "no_pairing": ~can_pair(tents, trees),
+        "touching_tents": touching,
+        "row_counts": (boards[:, 1:, width] != tents.sum(axis=2)).any(axis=1),
+        "column_counts": (boards[:, 0, :width] != tents.sum(axis=1)).any(axis=1),
+        "total_count": boards[:, 0, width] != tent_counts,
+        "board_trees": ((cells == TREE) != trees).any(axis=(1, 2)),
+        "tent_not_empty": (tents & (cells != EMPTY)).any(axis=(1, 2)),
+    }
+
+def _positions(value: object) -> np.ndarray | None:
+    # The positions of the pieces of a record as a (pieces, 2) array, None if they aren't a list of [x, y] pairs
+    positions = np.asarray(value, dtype=np.intp)
+    if positions.size == 0:
+        return positions.reshape(0, 2)
+    if positions.ndim != 2 or positions.shape[1] != 2:
+        return None
+    return positions
+
+def _parse_record(record: object, tent_density: float) -> tuple[tuple[int, int, float], np.ndarray, np.ndarray, np.ndarray] | None:
+    # The (height, width, density), board, tents and trees of a record, None if the record is broken
+    try:
+        height, width = int(record["height"]), int(record["width"])
+        density = float(record.get("density", tent_density))
+        board = np.asarray(record["board"], dtype=np.int64)
+        tents = _positions(record["tents"])
+        trees = _positions(record["trees"])
+    except (KeyError, TypeError, ValueError, OverflowError, AttributeError):
+        return None
+
+    if tents is None or trees is None or height < 1 or width < 1 or board.shape != (height + 1, width + 1):
+        return None
+
+    return (height, width, density), board, tents, trees
+
+def validate_records(records: list[dict], tent_density: float = TENT_DENSITY) -> tuple[int, Counter]:
+    """Validates exported puzzles (see export.to_ndjson), grouped by board shape and tent density.
+
+    Broken records are counted as invalid_record and skipped, so they don't stop the rest.
+
+    Args:
+        records (list[dict]): The puzzles.
+        tent_density (float, optional): The tent density for puzzles that don't have one in their record. Defaults to TENT_DENSITY.
+
+    Returns:
+        total, failures (int, Counter): The amount of puzzles and how many puzzles broke every rule.
+    """
+    failures: Counter = Counter()
+
+    # Every record says which density it was generated with (older packs don't, so they use the given one)
+    shapes: dict[tuple[int, int, float], list[tuple[np.ndarray, np.ndarray, np.ndarray]]] = {}
+    for record in records:
+        parsed = _parse_record(record, tent_density)
+        if parsed is None:
+            failures["invalid_record"] += 1
+            continue
+
+        shape, *puzzle = parsed
+        shapes.setdefault(shape, []).append(puzzle)
+
+    for (height, width, density), group in shapes.items():
+        boards = np.stack([board for board, _, _ in group])
+        tents, malformed_tents = positions_to_masks([tents for _, tents, _ in group], height, width)
+        trees, malformed_trees = positions_to_masks([trees for _, _, trees in group], height, width)
+
+        broken = validate_boards(boards, tents, trees, Geometry.tent_count(width, height, density))
+        broken["malformed"] = malformed_tents | malformed_trees | (tents & trees).any(axis=(1, 2))
+
+        for rule, mask in broken.items():
+            failures[rule] += int(mask.sum())
+
+    return len(records), failures
+
+def validate_puzzle(
+    board: np.ndarray, pieces: list[tuple[int, tuple[int, int], bool]], geometry: Geometry = DEFAULT_GEOMETRY
+) -> list[str]:
+    """Validates one puzzle straight from CREATE_VALID_GAME.
+
+    Args:
+        board (np.ndarray): The board.
+        pieces (list[tuple[int, tuple[int, int], bool]]): The pieces (in indices).
+        geometry (Geometry, optional): The shape of the board. Defaults to DEFAULT_GEOMETRY.
+
+    Returns:
+        list[str]: The rules the puzzle breaks.
+    """
+    _, failures = validate_records([{
+        "width": geometry.width,
+        "height": geometry.height,
+        "density": geometry.tent_density,
+        "board": board.tolist(),
+        "tents": [pos for name, pos, _ in pieces if name == TENT],
+        "trees": [pos for name, pos, _ in pieces if name == TREE],
+    }], geometry.tent_density)
+
+    return [rule for rule in RULES if failures[rule]]
+
+def _validate_lines(lines: list[str], tent_density: float) -> tuple[int, Counter]:
+    # Runs in the worker processes so the json parsing is spread out too
+    records = []
+    broken = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # Like a line that was cut off
+            broken += 1
+
+    total, failures = validate_records(records, tent_density)
+    failures["invalid_record"] += broken
+
+    return total + broken, failures
+
+def _chunks(paths: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            while chunk := list(islice(f, chunk_size)):
+                yield chunk
+
+def validate_files(
+    paths: Iterable[str], tent_density: float = TENT_DENSITY, workers: int | None = None, chunk_size: int = 10000
+) -> tuple[int, Counter]:
+    """Validates puzzle packs over a process pool.
+
+    Args:
+        paths (Iterable[str]): The ndjson files.
+        tent_density (float, optional): The tent density for puzzles that don't have one in their record. Defaults to TENT_DENSITY.
+        workers (int | None, optional): The amount of processes. Defaults to None (one per cpu).
+        chunk_size (int, optional): The amount of puzzles per task. Defaults to 10000.
+
+    Returns:
+        total, failures (int, Counter): The amount of puzzles and how many puzzles broke every rule.
+    """
+    total = 0
+    failures: Counter = Counter()
+
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers) as executor:
+        # Only keep a couple of chunks per worker in flight so big packs don't end up in memory
+        in_flight = []
+        max_in_flight = 2 * workers
+
+        for chunk in _chunks(paths, chunk_size):
+            in_flight.append(executor.submit(_validate_lines, chunk, tent_density))
+
+            if len(in_flight) >= max_in_flight:
+                count, counter = in_flight.pop(0).result()
+                total += count
+                failures.update(counter)
+
+        for future in in_flight:
+            count, counter = future.result()
+            total += count
+            failures.update(counter)
+
+    return total, failures
+
+# endregion
+
+# Main function
+def main() -> int:
+    """Validates the given puzzle packs and prints how many puzzles broke every rule."""
+    parser = argparse.ArgumentParser(description="Validate Tentje Boompje puzzle packs")
+    parser.add_argument("paths", nargs="+", help="ndjson files from export.py")
+    parser.add_argument("--density", type=float, default=TENT_DENSITY, help="tent density for puzzles without one in their record")
+    parser.add_argument("--workers", type=int, help="amount of processes (default: one per cpu)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="puzzles per task")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total, failures = validate_files(args.paths, args.density, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    print(f"Validated {total} puzzles in {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} puzzles/s)")
+    for rule in RULES:
+        print(f"{rule:>18}: {failures[rule]}")
+
+    return 1 if any(failures.values()) else 0
+
+
+# region misc __main__
+if __name__ == "__main__":
+    sys.exit(main())
+
+# endregion
@@ -1,25 +1,57 @@
 """Main file"""
 
 # region imports
+import os
 import sys
+import argparse
 import numpy as np
-import pygame as pg
-import pyautogui as pag # type: ignore
 from Utils.Scripts.settings import (
     lives,
-    DIMENSION,
+    WIDTH,
+    HEIGHT,
+    RECORD_REPLAYS,
     EMPTY,
     GRASS,
     TREE,
     TENT,
     fps_max,
+    SHOW_FRAME_STATS,
+    FRAME_REPORT,
     DEBUG,
     )  # Game constants
 from Utils.Scripts.funcs import (
-    CREATE_VALID_GAME,
-    get_neighbors,
     pretty_print,
     )  # Game functions
+from Utils.Scripts.game import (
+    Game,
+    ALREADY_CLICKED,
+    )  # Game logic
+from Utils.Scripts.replay import save_game
+from Utils.Scripts.frame_stats import FrameStats
+
+# endregion
+
+# region args
+
+# Parsed before pygame starts since headless needs another video driver
+parser = argparse.ArgumentParser(description="Tentje Boompje")
+parser.add_argument("--headless", action="store_true", help="play with scripted clicks without a window, print the frame stats and exit")
+parser.add_argument("--games", type=int, default=1, help="amount of games to play with --headless")
+args, _ = parser.parse_known_args()
+
+HEADLESS: bool = args.headless
+
+# Clicks are scripted every this many frames in headless mode
+HEADLESS_CLICK_EVERY: int = 5
+
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+
+# pyautogui needs a real display (only used for the dialogs)
+if not HEADLESS:
+    import pyautogui as pag # type: ignore
 
 # endregion
 
@@ -28,7 +60,7 @@ from Utils.Scripts.funcs import (
 # Setup
 pg.init()
 pg.display.set_caption("Tentje Boompje")
-pg.display.set_icon(pg.image.load(r"Utils\imgs\TENT.png"))
+pg.display.set_icon(pg.image.load(os.path.join("Utils", "imgs", "TENT.png")))
 
 # Set up the display (setting up with fullscreen being: 1280x720)
 screen_width: int = round(
@@ -52,7 +84,7 @@ clock = pg.time.Clock()
 # region classes
 class Tent:
     def __init__(self, pos: tuple[int, int]) -> None:
-        self.image = pg.image.load(r"Utils\imgs\TENT.png")  # Load the image
+        self.image = pg.image.load(os.path.join("Utils", "imgs", "TENT.png"))  # Load the image
         self.image = pg.transform.scale(
             self.image, (TILESIZE, TILESIZE)
         )  # Scale the image
@@ -64,7 +96,7 @@ class Tent:
 
 class Tree:
     def __init__(self, pos: tuple[int, int]) -> None:
-        self.image = pg.image.load(r"Utils\imgs\TREE.png")
+        self.image = pg.image.load(os.path.join("Utils", "imgs", "TREE.png"))
         self.image = pg.transform.scale(self.image, (TILESIZE, TILESIZE))
         self.rect = self.image.get_rect(center=pos)
 
@@ -74,7 +106,7 @@ class Tree:
 
 class Grass:
     def __init__(self, pos: tuple[int, int]) -> None:
-        self.image = pg.image.load(r"Utils\imgs\GRASS.png")
+        self.image = pg.image.load(os.path.join("Utils", "imgs", "GRASS.png"))
         self.image = pg.transform.scale(self.image, (TILESIZE, TILESIZE))
         self.rect = self.image.get_rect(center=pos)
 
@@ -128,6 +160,30 @@ class FPSCounter:
         )
 
 
+class FrameStatsCounter(FPSCounter):
+    """fps counter that also shows the frame time jitter and the latency of the last click"""
+
+    def __init__(
+        self,
+        surface: pg.Surface,
+        font: pg.font.Font,
+        clock: pg.time.Clock,
+        color: tuple[int, int, int],
+        pos: tuple[int, int, int, int],
+        stats: FrameStats,
+    ):
+        self.stats = stats
+        super().__init__(surface, font, clock, color, pos)
+
+    def update(self):
+        text = f"FPS: {self.clock.get_fps():2.0f} | jitter: {self.stats.jitter:.1f}ms | click: {self.stats.last_latency:.1f}ms"
+        self.fps_text = self.font.render(text, True, self.color)
+        # Grow to the right instead of around the center since the text is a lot longer
+        self.fps_text_rect = self.fps_text.get_rect(
+            midleft=(self.pos[0], self.pos[1] + (self.pos[3] // 2))
+        )
+
+
 class LivesCounter:
     def __init__(self, lives: int, pos: tuple[int, int]) -> None:
         self.lives = lives
@@ -153,14 +209,26 @@ top_margin: int = int(
 )  # Margin = 30 pixels if the game has 600 height
 
 # The size of the tiles which has to be the whole screen width divided by the dimension of the board
-TILESIZE = round(((screen_height - top_margin) // (DIMENSION + 1)) * 0.85)
+TILESIZE = round(((screen_height - top_margin) // (max(WIDTH, HEIGHT) + 1)) * 0.85)
 margin: int = 7
 
+# Frame time and click latency statistics
+frame_stats = FrameStats()
+
 # Fps counter
-fps_counter = FPSCounter(
-    screen, pg.font.Font(None, 24), clock, (255, 255, 255), (5, 0, 75, 30)
+fps_counter = (
+    FrameStatsCounter(
+        screen, pg.font.Font(None, 24), clock, (255, 255, 255), (5, 0, 75, 30), frame_stats
+    )
+    if SHOW_FRAME_STATS
+    else FPSCounter(
+        screen, pg.font.Font(None, 24), clock, (255, 255, 255), (5, 0, 75, 30)
+    )
 )
 
+# The part of the screen the counter is drawn on
+fps_counter_space = pg.rect.Rect(0, 0, screen_width // 2 if SHOW_FRAME_STATS else 100, 30)
+
 # Lives counter
 lives_counter: LivesCounter = LivesCounter(lives, (screen_width - 5, 5))
 
@@ -170,13 +238,9 @@ running: bool = True
 
 # region Events
 
-# Clear events event
-CLEAR_EVENTS = pg.USEREVENT + 1
-# Clear every 5 seconds
-pg.time.set_timer(CLEAR_EVENTS, 5000)
-
-# Update board event
-UPDATE_BOARD = pg.USEREVENT + 2
+# The queue is emptied every frame, so nothing has to be cleared (which could throw away clicks).
+# Mouse movement isn't used so don't let it fill up the queue at all.
+pg.event.set_blocked(pg.MOUSEMOTION)
 
 # endregion
 
@@ -264,8 +328,8 @@ def draw_board(
         pieces (list[tuple[int, tuple[int, int], bool]]): The list of pieces and their position also if to draw them or not.
     """
 
-    for y in range(DIMENSION + 1):
-        for x in range(DIMENSION + 1):
+    for y in range(HEIGHT + 1):
+        for x in range(WIDTH + 1):
             pos = convert_cords(True, (x, y))
             
             for i, piece_pos in enumerate([piece[1] for piece in pieces]):
@@ -279,7 +343,7 @@ def draw_board(
                             break
 
             else:
-                if y == 0 or x == DIMENSION:
+                if y == 0 or x == WIDTH:
                     Text(str(board[y][x]), pos).draw(screen)
                 else:
                     if board[y][x] == EMPTY:
@@ -288,40 +352,41 @@ def draw_board(
                     elif board[y][x] == GRASS:
                         Grass(pos).draw(screen)
 
-def clicked_on_tent(board: np.ndarray, pos: tuple[int, int]) -> None:
-    """When the player clicks on a tent we update the board to show that the player clicked on a tent.
+def piece_at(pieces: list[tuple[int, tuple[int, int], bool]], pos: tuple[int, int]) -> int | None:
+    """Returns the index of the piece the player clicked on.
 
     Args:
-        board (np.ndarray): the current board position
-        pos (tuple[int, int]): position of the tent (in pixels)
+        pieces (list[tuple[int, tuple[int, int], bool]]): the pieces list with x and y cords.
+        pos (tuple[int, int]): the position of the click (in pixels).
+
+    Returns:
+        int | None: the index of the piece in the list, None if the click wasn't on a piece.
     """
-    
-    # Convert the pixel positions to indexes
-    row, col = convert_cords(False, pos)
-    
-    # Get all the surrounding
-    neighbors = get_neighbors((row, col), 8)
-    
-    # set all the surrounding spaces to grass
-    for n_col, n_row in neighbors:
-        if board[n_row][n_col] != TREE and n_row != 0 and n_col != DIMENSION:
-            board[n_row][n_col] = GRASS
-
-    # Update the board
-    board[col][DIMENSION] -= 1
-    board[0][row] -= 1
-    
-    # if the row is empty set all the spaces to grass
-    if board[0][row] <= 0:
-        for x in range(1, DIMENSION + 1):
-            if board[x][row] == EMPTY:
-                board[x][row] = GRASS
-
-    # if the column is empty set all the spaces to grass
-    if board[col][DIMENSION] <= 0:
-        for y in range(DIMENSION):
-            if board[col][y] == EMPTY:
-                board[col][y] = GRASS
+    for i, (_, (piece_x, piece_y), _) in enumerate(pieces):
+        # If the user clicked on a piece (tree or tent)
+        if (
+            # mouse x-pos is in the range of the piece
+            (piece_x - TILESIZE // 2) < pos[0] < (piece_x + TILESIZE // 2)
+        ) and (
+            # mouse y-pos is in the range of the piece
+            (piece_y - TILESIZE // 2) < pos[1] < (piece_y + TILESIZE // 2)
+        ):
+            return i
+
+    return None
+
+def post_scripted_click(game: Game) -> None:
+    """Puts a click on a tent that isn't placed yet in the event queue (for headless mode).
+
+    Args:
+        game (Game): The game to click in.
+    """
+    pos = game.hint()
+    if pos is None:
+        return
+
+    _, pixel_pos, _ = get_positions_of_all_PIECES([(TENT, pos, False)])[0]
+    pg.event.post(pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=pixel_pos))
 
 # endregion
 
@@ -332,105 +397,65 @@ def main() -> int:
     # region main
     
     global running
-    global lives
+
+    games_left = args.games
     
     while running:
-        # Create the game board
-        board, trees_and_tents = CREATE_VALID_GAME()
+        # Create the game
+        game = Game()
+        start_time = pg.time.get_ticks()
 
-        trees_and_tents = get_positions_of_all_PIECES(trees_and_tents)
+        # Only measure this game (not the dialogs or the generation before it)
+        frame_stats.reset()
 
         # Pretty print the board
-        pretty_print(board)
+        pretty_print(game.board)
 
-        # Throw a move event to draw the game
-        pg.event.post(pg.event.Event(UPDATE_BOARD))
+        # Draw the game in the first frame
+        redraw = True
+        frame = 0
 
         # Main loop
-        while lives != 0: # While the player has lives
+        while not game.over: # While the player has lives and hasn't won yet
             # Play the game:
             # Clear the screen
             screen.fill((0, 0, 0))
 
             # Event handling
+            frame_stats.poll()
             for e in pg.event.get():
                 if DEBUG:
-                    if e.type not in (pg.MOUSEMOTION, pg.WINDOWENTER, pg.WINDOWLEAVE, CLEAR_EVENTS, pg.ACTIVEEVENT, pg.WINDOWEXPOSED, pg.WINDOWMOVED, pg.VIDEOEXPOSE):
+                    if e.type not in (pg.MOUSEMOTION, pg.WINDOWENTER, pg.WINDOWLEAVE, pg.ACTIVEEVENT, pg.WINDOWEXPOSED, pg.WINDOWMOVED, pg.VIDEOEXPOSE):
                         print(f"Event: {e}")
 
                 if e.type == pg.QUIT:
-                    lives = 0 
                     running = False
 
-                elif e.type == CLEAR_EVENTS:
-                    pg.event.clear()
-
                 # Main game event
                 elif e.type == pg.MOUSEBUTTONDOWN:
                     if e.button == 1:
-                        # Update the board
-                        for i, PIECE in enumerate(trees_and_tents):
-                            # Piece name
-                            name = PIECE[0]
-
-                            # Piece cords
-                            piece_cords = PIECE[1]
-                            piece_x = piece_cords[0]
-                            piece_y = piece_cords[1]
-
-                            # If the user clicked on a piece (tree or tent)
-                            if (
-                                # mouse x-pos is in the range of the piece
-                                (
-                                    (piece_x - TILESIZE // 2)
-                                    < e.pos[0]
-                                    < (piece_x + TILESIZE // 2)
-                                )
-                            ) and (
-                                # mouse y-pos is in the range of the piece
-                                (
-                                    piece_y - TILESIZE // 2
-                                    < e.pos[1]
-                                    < (piece_y + TILESIZE // 2)
-                                )
-                            ):
-                                # If the piece is a Tent and it hasn't been placed yet
-                                if name == TENT and not PIECE[2]:
-                                    PIECE = (name, (piece_x, piece_y), True)
-                                    trees_and_tents[i] = PIECE
-                                    # Update the far right column
-                                    board[0][DIMENSION] -= 1
-                                    clicked_on_tent(board, piece_cords)
-
-                                    pg.event.post(pg.event.Event(UPDATE_BOARD))
-
-                                else:
-                                    print("That's a tree... or a tent you've already clicked...")
-
-                                break
-                        else:
-                            # Decrease lives when the player clicks on a wrong space
-                            lives -= 1
-
-                            pg.event.post(pg.event.Event(UPDATE_BOARD))
-
-                # region user events
+                        frame_stats.click()
 
-                elif e.type == UPDATE_BOARD:
-                    # Draw the board
-                    draw_board(
-                        screen, board, trees_and_tents
-                    )  # Only draw the board when asked -> fps baby!!!!
+                        # The game keeps the pieces in indices so get their pixel positions
+                        trees_and_tents = get_positions_of_all_PIECES(list(game.pieces))
+                        i = piece_at(trees_and_tents, e.pos)
 
-                    # Update the lives_counter
-                    lives_counter.update(lives)
-                    # Draw the lives counter
-                    lives_counter.draw(screen)
-
-                    # Update the ENTIRE display (doesn't matter much here wince we won't save much performance by updating only the places that changed)
-                    pg.display.flip()
+                        # Update the board
+                        result = game.click(
+                            game.pieces[i][1] if i is not None else None,
+                            pg.time.get_ticks() - start_time,
+                        )
+
+                        if result == ALREADY_CLICKED:
+                            # Nothing changes on the screen so there's no latency to measure
+                            frame_stats.unchanged()
+                            print("That's a tree... or a tent you've already clicked...")
+                        else:
+                            # Redraw after placing a tent or losing a life (in this frame, not the next one)
+                            redraw = True
 
-                # endregion
+            if not running:
+                break
 
             # Update everything
             fps_counter.update()
@@ -438,30 +463,52 @@ def main() -> int:
             # Draw everything
             fps_counter.draw()
 
-            # Define which places to update
-            fps_counter_space = pg.rect.Rect(0, 0, 100, 30)
             line = pg.draw.line(
                 screen, (200, 200, 200), (0, top_margin), (screen_width, top_margin)
             )
 
-            # Update the display
-            pg.display.update([fps_counter_space, line])
-            clock.tick(fps_max)
-            
-            # Check if the player has won
-            if board[0][DIMENSION] == 0:
-                # Show the last tent clicked
-                draw_board(screen, board, trees_and_tents)
-                
-                # Draw the lives counter (so it doesn't dissapear)
+            if redraw:
+                # Draw the board
+                draw_board(
+                    screen, game.board, get_positions_of_all_PIECES(list(game.pieces))
+                )  # Only draw the board when asked -> fps baby!!!!
+
+                # Update the lives_counter
+                lives_counter.update(game.lives)
+                # Draw the lives counter
                 lives_counter.draw(screen)
-                
-                # Update the display
+
+                # Update the ENTIRE display (doesn't matter much here wince we won't save much performance by updating only the places that changed)
                 pg.display.flip()
+                redraw = False
+
+            else:
+                # Only update the counter and the line
+                pg.display.update([fps_counter_space, line])
+
+            # Everything up to now is on the screen
+            frame_stats.frame()
+
+            # The click waits in the queue during the tick like a real one would
+            frame += 1
+            if HEADLESS and frame % HEADLESS_CLICK_EVERY == 0:
+                post_scripted_click(game)
+
+            clock.tick(fps_max)
+
+        if RECORD_REPLAYS:
+            save_game(game)
+
+        if FRAME_REPORT or HEADLESS:
+            print(frame_stats.report())
 
-                break # Break the loop if the player has won
+        if HEADLESS:
+            # No dialogs, just play the next game
+            games_left -= 1
+            running = running and games_left > 0
+            continue
 
-        if lives == 0:
+        if not game.won:
             pag.alert(text="You've lost", title="You lost 😥", button="OK")
         else:
             pag.alert(text="You've won", title="You won 🎉", button="OK")
@@ -471,8 +518,6 @@ def main() -> int:
             if pag.confirm(text='You want to go again?', title='Go again?', buttons=['Y', 'N']) == 'N'
             else True
         )
-        if running:
-            lives = 3
 
         # endregion
 